@@ -1,15 +1,54 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.routing import APIRoute
+from fastapi.encoders import decimal_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, insert, select, update, type_coerce, Date, DateTime, Float, Numeric
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from datetime import date, timedelta
 from decimal import Decimal
+import json
+import zlib
 
 import models
 import schemas
-from database import get_mst_now, get_db, init_db, engine, MST_TIMEZONE
-from mrp import MRPEngine
+from database import get_mst_now, get_db, init_db, engine, MST_TIMEZONE, SessionLocal
+from mrp import MRPEngine, horizon_calendar, project_inventory
+
+# Largest request body accepted after gzip inflation (guards against gzip bombs)
+MAX_INFLATED_REQUEST_BYTES = 50 * 1024 * 1024
+
+class GzipRequest(Request):
+    """Request whose body is transparently inflated when sent with Content-Encoding: gzip"""
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            if "gzip" in self.headers.getlist("Content-Encoding"):
+                # Inflate at most one byte past the limit so oversized bodies
+                # are detected without materializing them
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                body = decompressor.decompress(body, MAX_INFLATED_REQUEST_BYTES + 1)
+                if len(body) > MAX_INFLATED_REQUEST_BYTES:
+                    raise HTTPException(status_code=413, detail="Request body too large")
+                if not decompressor.eof:
+                    raise HTTPException(status_code=400, detail="Invalid gzip request body")
+            self._body = body
+        return self._body
+
+class GzipRoute(APIRoute):
+    """Route that accepts gzip-compressed request bodies (e.g. nightly sales imports)"""
+
+    def get_route_handler(self):
+        original_route_handler = super().get_route_handler()
+
+        async def custom_route_handler(request: Request):
+            return await original_route_handler(GzipRequest(request.scope, request.receive))
+
+        return custom_route_handler
 
 # Create FastAPI app
 app = FastAPI(
@@ -17,6 +56,11 @@ app = FastAPI(
     description="Multi-Product Material Requirements Planning System",
     version="1.0.0"
 )
+app.router.route_class = GzipRoute
+
+# Compress larger responses; GZipMiddleware does not inflate request bodies,
+# which GzipRoute handles instead
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # Configure CORS
 app.add_middleware(
@@ -211,7 +255,7 @@ def get_inventory(db: Session = Depends(get_db)):
             product_id=inv.product_id,
             on_hand=inv.on_hand,
             allocated=inv.allocated,
-            available=Decimal(str(inv.available)),
+            available=inv.available,
             last_updated=inv.last_updated,
             product_code=inv.product.code,
             product_name=inv.product.name,
@@ -426,7 +470,7 @@ def get_product_inventory(product_id: int, db: Session = Depends(get_db)):
         product_id=inv.product_id,
         on_hand=inv.on_hand,
         allocated=inv.allocated,
-        available=Decimal(str(inv.available)),
+        available=inv.available,
         last_updated=inv.last_updated,
         product_code=inv.product.code,
         product_name=inv.product.name,
@@ -529,22 +573,18 @@ def get_daily_build_analysis(days: int = 90, db: Session = Depends(get_db)):
     Calculate CONSOLIDATED daily material consumption across ALL products based on weekly shipment goals and BOMs.
     Returns a component-centric view showing actual total consumption and run-out dates.
     """
-    from datetime import datetime, timedelta
+    from datetime import datetime
     from collections import defaultdict
 
     # Calculate date range
     start_date = date.today()
-    dates = [start_date + timedelta(days=i) for i in range(days)]
 
-    # Get weekly shipment goals for the date range - FOR ALL PRODUCTS
-    week_starts = set()
-    for d in dates:
-        week_start = d - timedelta(days=d.weekday())
-        week_starts.add(week_start)
+    # Dates, week index and weekday flag for each day (cached per horizon)
+    dates, _, week_of, is_weekday, week_starts = horizon_calendar(start_date, days)
 
-    # Fetch ALL weekly shipments for these weeks
+    # Fetch ALL weekly shipments for these weeks - FOR ALL PRODUCTS
     all_shipments = db.query(models.WeeklyShipment).filter(
-        models.WeeklyShipment.week_start_date.in_(list(week_starts))
+        models.WeeklyShipment.week_start_date.in_(week_starts)
     ).all()
 
     # Group shipments by product_id and week
@@ -552,18 +592,15 @@ def get_daily_build_analysis(days: int = 90, db: Session = Depends(get_db)):
     for s in all_shipments:
         shipments_by_product[s.product_id][s.week_start_date] = float(s.goal)
 
-    # Calculate daily production targets for EACH product
-    daily_production_by_product = defaultdict(dict)
+    # Daily production targets for EACH product as float lists ordered like
+    # `dates`: a fifth of the week's goal on weekdays, nothing on weekends
+    daily_production_by_product = {}
     for product_id, weekly_goals in shipments_by_product.items():
-        for d in dates:
-            week_start = d - timedelta(days=d.weekday())
-            weekly_goal = weekly_goals.get(week_start, 0)
-
-            # Only produce on weekdays (Mon-Fri)
-            if d.weekday() < 5:  # 0-4 are Mon-Fri
-                daily_production_by_product[product_id][d] = weekly_goal / 5
-            else:
-                daily_production_by_product[product_id][d] = 0
+        daily_rate_by_week = [weekly_goals.get(week_start, 0) / 5 for week_start in week_starts]
+        daily_production_by_product[product_id] = [
+            daily_rate_by_week[week] if weekday else 0.0
+            for week, weekday in zip(week_of, is_weekday)
+        ]
 
     # Get ALL BOM lines to understand component usage
     all_bom_lines = db.query(models.BOMLine).all()
@@ -604,11 +641,6 @@ def get_daily_build_analysis(days: int = 90, db: Session = Depends(get_db)):
         for po in pending_pos:
             po_arrivals_by_date[po.expected_date] += float(po.quantity)
 
-        # Calculate TOTAL daily consumption across ALL products that use this component
-        daily_data = []
-        running_inventory = current_stock
-        run_out_date = None
-
         # Build list of products that use this component (do this once, not in the loop)
         used_in_products = []
         seen_products = set()
@@ -622,38 +654,34 @@ def get_daily_build_analysis(days: int = 90, db: Session = Depends(get_db)):
                     'quantity_per': usage['quantity_per']
                 })
 
-        for d in dates:
-            total_consumption = 0
-
-            # Sum consumption from ALL products that use this component
-            for usage in component_usage[component.id]:
-                parent_product_id = usage['parent_product_id']
-                quantity_per = usage['quantity_per']
-
-                # Get daily production for this parent product
-                if parent_product_id in daily_production_by_product:
-                    production = daily_production_by_product[parent_product_id].get(d, 0)
-                    consumption = production * quantity_per
-                    total_consumption += consumption
-
-            # Add incoming PO if arriving today
-            incoming_po = po_arrivals_by_date.get(d, 0)
+        # Calculate TOTAL daily consumption across ALL products that use this component
+        consumption = [0.0] * days
+        for usage in component_usage[component.id]:
+            production = daily_production_by_product.get(usage['parent_product_id'])
+            if production is None:
+                continue
+            quantity_per = usage['quantity_per']
+            consumption = [total + qty * quantity_per for total, qty in zip(consumption, production)]
 
-            # Calculate end of day inventory (subtract consumption, add incoming PO)
-            running_inventory -= total_consumption
-            running_inventory += incoming_po
+        # Incoming PO quantity for each day
+        arrivals = [po_arrivals_by_date.get(d, 0.0) for d in dates]
 
-            # Record when we first go negative
-            if run_out_date is None and running_inventory < 0:
-                run_out_date = d.isoformat()
+        # End of day inventory (subtract consumption, add incoming PO) and
+        # the first day it goes negative
+        reorder_point = float(component.reorder_point) if component.reorder_point else 0
+        projected, _, run_out_idx = project_inventory(current_stock, consumption, reorder_point, arrivals)
+        run_out_date = dates[run_out_idx].isoformat() if run_out_idx >= 0 else None
 
-            daily_data.append({
+        daily_data = [
+            {
                 'date': d.isoformat(),
                 'day_of_week': d.strftime('%a'),
                 'consumption': round(total_consumption, 2),
                 'incoming_po': round(incoming_po, 2) if incoming_po > 0 else 0,
-                'projected_inventory': round(running_inventory, 2)
-            })
+                'projected_inventory': round(qty, 2)
+            }
+            for d, total_consumption, incoming_po, qty in zip(dates, consumption, arrivals, projected)
+        ]
 
         # Calculate days until run out
         days_of_inventory = None
@@ -674,7 +702,6 @@ def get_daily_build_analysis(days: int = 90, db: Session = Depends(get_db)):
         } for po in pending_pos]
 
         # Get product details for reorder calculations
-        reorder_point = float(component.reorder_point) if component.reorder_point else 0
         reorder_qty = float(component.reorder_qty) if component.reorder_qty else 0
         lead_time_days = component.lead_time_days or 0
         order_multiple = float(component.order_multiple) if component.order_multiple else 1
@@ -735,15 +762,16 @@ def get_demand(product_id: int, days: int = 30, db: Session = Depends(get_db)):
 @app.post("/api/demand")
 def save_demand(demand_data: schemas.DailyDemandBulkCreate, db: Session = Depends(get_db)):
     """Save demand forecast (bulk)"""
-    from datetime import datetime
-
-    # Convert date strings to date objects
-    parsed_demands = []
-    for demand in demand_data.demands:
-        demand_date = demand['demand_date']
-        if isinstance(demand_date, str):
-            demand_date = datetime.strptime(demand_date, '%Y-%m-%d').date()
-        parsed_demands.append({'demand_date': demand_date, 'quantity': demand['quantity']})
+    # Build insert mappings straight from the validated payload
+    parsed_demands = [
+        {
+            'product_id': demand_data.product_id,
+            'demand_date': date.fromisoformat(demand['demand_date'])
+                if isinstance(demand['demand_date'], str) else demand['demand_date'],
+            'quantity': Decimal(str(demand['quantity']))
+        }
+        for demand in demand_data.demands
+    ]
 
     # Delete existing demands for this product in the date range
     dates_to_update = [d['demand_date'] for d in parsed_demands]
@@ -752,14 +780,9 @@ def save_demand(demand_data: schemas.DailyDemandBulkCreate, db: Session = Depend
         models.DailyDemand.demand_date.in_(dates_to_update)
     ).delete(synchronize_session=False)
 
-    # Add new demands
-    for demand in parsed_demands:
-        db_demand = models.DailyDemand(
-            product_id=demand_data.product_id,
-            demand_date=demand['demand_date'],
-            quantity=Decimal(str(demand['quantity']))
-        )
-        db.add(db_demand)
+    # Add new demands in a single executemany INSERT
+    if parsed_demands:
+        db.execute(insert(models.DailyDemand), parsed_demands)
 
     db.commit()
     return {"message": f"Saved {len(parsed_demands)} demand records"}
@@ -935,8 +958,6 @@ def get_sales_history(product_id: int, days: int = 30, db: Session = Depends(get
 @app.post("/api/sales")
 def save_sales_history(sales_data: schemas.SalesHistoryBulkCreate, db: Session = Depends(get_db)):
     """Save sales history (bulk) and deduct inventory for shipped products"""
-    from datetime import datetime
-
     # Get product info
     product = db.query(models.Product).filter(models.Product.id == sales_data.product_id).first()
     if not product:
@@ -952,7 +973,7 @@ def save_sales_history(sales_data: schemas.SalesHistoryBulkCreate, db: Session =
     for sale in sales_data.sales_data:
         sale_date = sale['sale_date']
         if isinstance(sale_date, str):
-            sale_date = datetime.strptime(sale_date, '%Y-%m-%d').date()
+            sale_date = date.fromisoformat(sale_date)
         parsed_sales.append({
             'sale_date': sale_date,
             'quantity_sold': sale['quantity_sold'],
@@ -988,15 +1009,17 @@ def save_sales_history(sales_data: schemas.SalesHistoryBulkCreate, db: Session =
         models.SalesHistory.sale_date.in_(dates_to_update)
     ).delete(synchronize_session=False)
 
-    # Add new sales records
-    for sale in parsed_sales:
-        db_sale = models.SalesHistory(
-            product_id=sales_data.product_id,
-            sale_date=sale['sale_date'],
-            quantity_sold=Decimal(str(sale['quantity_sold'])),
-            notes=sale['notes']
-        )
-        db.add(db_sale)
+    # Add new sales records in a single executemany INSERT
+    if parsed_sales:
+        db.execute(insert(models.SalesHistory), [
+            {
+                'product_id': sales_data.product_id,
+                'sale_date': sale['sale_date'],
+                'quantity_sold': Decimal(str(sale['quantity_sold'])),
+                'notes': sale['notes']
+            }
+            for sale in parsed_sales
+        ])
 
     # Adjust inventory for the quantity changes
     if inventory_adjustments:
@@ -1097,20 +1120,28 @@ def bulk_import_sales(sales_update: schemas.MultiProductSalesUpdate, db: Session
         }
     }
     """
-    from datetime import datetime
-
     results = {
         'success': [],
         'errors': [],
         'total_records': 0
     }
 
+    # Resolve every product code in the payload with a single query
+    products_by_code = {
+        code: (product_id, name) for product_id, code, name in db.query(
+            models.Product.id, models.Product.code, models.Product.name
+        ).filter(
+            models.Product.code.in_(list(sales_update.sales_by_product_code))
+        )
+    }
+
+    # Sales rows for every product, inserted together after the loop
+    all_sales = []
+
     for product_code, sales_records in sales_update.sales_by_product_code.items():
         try:
             # Find product by code
-            product = db.query(models.Product).filter(
-                models.Product.code == product_code
-            ).first()
+            product = products_by_code.get(product_code)
 
             if not product:
                 results['errors'].append({
@@ -1119,39 +1150,33 @@ def bulk_import_sales(sales_update: schemas.MultiProductSalesUpdate, db: Session
                 })
                 continue
 
-            # Parse and validate sales records
-            parsed_sales = []
-            for sale in sales_records:
-                sale_date = sale['sale_date']
-                if isinstance(sale_date, str):
-                    sale_date = datetime.strptime(sale_date, '%Y-%m-%d').date()
-                parsed_sales.append({
-                    'sale_date': sale_date,
-                    'quantity_sold': sale['quantity_sold'],
+            product_id, product_name = product
+
+            # Parse and validate sales records into insert mappings
+            parsed_sales = [
+                {
+                    'product_id': product_id,
+                    'sale_date': date.fromisoformat(sale['sale_date'])
+                        if isinstance(sale['sale_date'], str) else sale['sale_date'],
+                    'quantity_sold': Decimal(str(sale['quantity_sold'])),
                     'notes': sale.get('notes', '')
-                })
+                }
+                for sale in sales_records
+            ]
 
             # Delete existing sales for these dates (upsert behavior)
             dates_to_update = [s['sale_date'] for s in parsed_sales]
             db.query(models.SalesHistory).filter(
-                models.SalesHistory.product_id == product.id,
+                models.SalesHistory.product_id == product_id,
                 models.SalesHistory.sale_date.in_(dates_to_update)
             ).delete(synchronize_session=False)
 
-            # Insert new sales records
-            for sale in parsed_sales:
-                db_sale = models.SalesHistory(
-                    product_id=product.id,
-                    sale_date=sale['sale_date'],
-                    quantity_sold=Decimal(str(sale['quantity_sold'])),
-                    notes=sale['notes']
-                )
-                db.add(db_sale)
-                results['total_records'] += 1
+            all_sales.extend(parsed_sales)
+            results['total_records'] += len(parsed_sales)
 
             results['success'].append({
                 'product_code': product_code,
-                'product_name': product.name,
+                'product_name': product_name,
                 'records_imported': len(parsed_sales)
             })
 
@@ -1161,6 +1186,10 @@ def bulk_import_sales(sales_update: schemas.MultiProductSalesUpdate, db: Session
                 'error': str(e)
             })
 
+    # Insert new sales records for all products in a single executemany INSERT
+    if all_sales:
+        db.execute(insert(models.SalesHistory), all_sales)
+
     db.commit()
 
     return {
@@ -1456,58 +1485,91 @@ def save_weekly_shipments(shipment_data: schemas.WeeklyShipmentBulkUpdate, db: S
 # PURCHASE ORDER ENDPOINTS
 # ============================================================================
 
+# Columns returned by the purchase-order list, and a per-column JSON converter
+# chosen once from the column type so rows don't go through jsonable_encoder
+_PO_LIST_COLUMNS = (
+    *models.PurchaseOrder.__table__.columns,
+    models.Product.code.label("product_code"),
+    models.Product.name.label("product_name")
+)
+
+def _json_converter(column_type):
+    """Return the converter for a column type, or None if values pass through"""
+    if isinstance(column_type, (Date, DateTime)):
+        return lambda value: value.isoformat() if value is not None else None
+    if isinstance(column_type, Numeric):
+        return lambda value: decimal_encoder(value) if value is not None else None
+    return None
+
+_PO_ROW_ENCODERS = tuple((column.key, _json_converter(column.type)) for column in _PO_LIST_COLUMNS)
+
+def _encode_po_row(row):
+    """Project a purchase-order list row into a JSON-ready dict"""
+    return {
+        key: converter(value) if converter else value
+        for (key, converter), value in zip(_PO_ROW_ENCODERS, row)
+    }
+
+def _purchase_order_counts(db: Session):
+    """Count purchase orders per status with a single GROUP BY query"""
+    by_status = dict(
+        db.query(models.PurchaseOrder.status, func.count(models.PurchaseOrder.id))
+        .group_by(models.PurchaseOrder.status)
+        .all()
+    )
+    return {
+        "pending": by_status.get('pending', 0),
+        "received": by_status.get('received', 0),
+        "all": sum(by_status.values())
+    }
+
 @app.get("/api/purchase-orders")
 def get_purchase_orders(
     status: Optional[str] = None,
     product_id: Optional[int] = None,
+    include_counts: bool = True,
     db: Session = Depends(get_db)
 ):
     """Get all purchase orders with optional filtering and status counts"""
-    # Get counts for all statuses (regardless of filter)
-    pending_count = db.query(models.PurchaseOrder).filter(models.PurchaseOrder.status == 'pending').count()
-    received_count = db.query(models.PurchaseOrder).filter(models.PurchaseOrder.status == 'received').count()
-    total_count = db.query(models.PurchaseOrder).count()
+    # Get counts for all statuses (regardless of filter) unless the caller opted out
+    counts = _purchase_order_counts(db) if include_counts else None
 
-    # Build filtered query
-    query = db.query(models.PurchaseOrder)
+    # Build filtered query over plain columns so rows can be streamed
+    # without hydrating ORM objects
+    stmt = select(*_PO_LIST_COLUMNS).outerjoin(models.Product, models.PurchaseOrder.product_id == models.Product.id)
 
     if status:
-        query = query.filter(models.PurchaseOrder.status == status)
+        stmt = stmt.where(models.PurchaseOrder.status == status)
     if product_id:
-        query = query.filter(models.PurchaseOrder.product_id == product_id)
+        stmt = stmt.where(models.PurchaseOrder.product_id == product_id)
 
-    pos = query.order_by(models.PurchaseOrder.expected_date.asc()).all()
+    stmt = stmt.order_by(models.PurchaseOrder.expected_date.asc())
 
-    # Add product info
-    result = []
-    for po in pos:
-        po_dict = {
-            "id": po.id,
-            "po_number": po.po_number,
-            "product_id": po.product_id,
-            "order_date": po.order_date,
-            "expected_date": po.expected_date,
-            "quantity": po.quantity,
-            "status": po.status,
-            "received_date": po.received_date,
-            "received_quantity": po.received_quantity,
-            "supplier": po.supplier,
-            "notes": po.notes,
-            "created_at": po.created_at,
-            "updated_at": po.updated_at,
-            "product_code": po.product.code if po.product else None,
-            "product_name": po.product.name if po.product else None
-        }
-        result.append(po_dict)
+    def generate():
+        # The request-scoped session is closed as soon as the handler returns,
+        # so the stream reads through a session of its own
+        stream_db = SessionLocal()
+        try:
+            yield b'{"purchase_orders": ['
+            first = True
+            for row in stream_db.execute(stmt).yield_per(500):
+                if not first:
+                    yield b", "
+                first = False
+                yield json.dumps(_encode_po_row(row)).encode()
+            if counts is None:
+                yield b']}'
+            else:
+                yield b'], "counts": ' + json.dumps(counts).encode() + b'}'
+        finally:
+            stream_db.close()
 
-    return {
-        "purchase_orders": result,
-        "counts": {
-            "pending": pending_count,
-            "received": received_count,
-            "all": total_count
-        }
-    }
+    return StreamingResponse(generate(), media_type="application/json")
+
+@app.get("/api/purchase-orders/counts")
+def get_purchase_order_counts(db: Session = Depends(get_db)):
+    """Get purchase order counts by status"""
+    return _purchase_order_counts(db)
 
 @app.get("/api/purchase-orders/{po_id}", response_model=schemas.PurchaseOrder)
 def get_purchase_order(po_id: int, db: Session = Depends(get_db)):
@@ -1516,63 +1578,28 @@ def get_purchase_order(po_id: int, db: Session = Depends(get_db)):
     if not po:
         raise HTTPException(status_code=404, detail="Purchase order not found")
 
-    po_dict = {
-        "id": po.id,
-        "po_number": po.po_number,
-        "product_id": po.product_id,
-        "order_date": po.order_date,
-        "expected_date": po.expected_date,
-        "quantity": po.quantity,
-        "status": po.status,
-        "received_date": po.received_date,
-        "received_quantity": po.received_quantity,
-        "supplier": po.supplier,
-        "notes": po.notes,
-        "created_at": po.created_at,
-        "updated_at": po.updated_at,
-        "product_code": po.product.code if po.product else None,
-        "product_name": po.product.name if po.product else None
-    }
-    return schemas.PurchaseOrder(**po_dict)
+    return schemas.PurchaseOrder.model_validate(po)
 
 @app.post("/api/purchase-orders", response_model=schemas.PurchaseOrder)
 def create_purchase_order(po: schemas.PurchaseOrderCreate, db: Session = Depends(get_db)):
     """Create a new purchase order"""
-    # Check if PO number already exists
-    existing = db.query(models.PurchaseOrder).filter(
-        models.PurchaseOrder.po_number == po.po_number
-    ).first()
-    if existing:
-        raise HTTPException(status_code=400, detail=f"PO number {po.po_number} already exists")
-
     # Check if product exists
-    product = db.query(models.Product).filter(models.Product.id == po.product_id).first()
-    if not product:
+    product_exists = db.query(models.Product.id).filter(models.Product.id == po.product_id).first()
+    if not product_exists:
         raise HTTPException(status_code=404, detail="Product not found")
 
+    # Let the UNIQUE constraint on po_number reject duplicates as part of the
+    # INSERT instead of an extra SELECT
     db_po = models.PurchaseOrder(**po.dict())
     db.add(db_po)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"PO number {po.po_number} already exists")
     db.refresh(db_po)
 
-    po_dict = {
-        "id": db_po.id,
-        "po_number": db_po.po_number,
-        "product_id": db_po.product_id,
-        "order_date": db_po.order_date,
-        "expected_date": db_po.expected_date,
-        "quantity": db_po.quantity,
-        "status": db_po.status,
-        "received_date": db_po.received_date,
-        "received_quantity": db_po.received_quantity,
-        "supplier": db_po.supplier,
-        "notes": db_po.notes,
-        "created_at": db_po.created_at,
-        "updated_at": db_po.updated_at,
-        "product_code": product.code,
-        "product_name": product.name
-    }
-    return schemas.PurchaseOrder(**po_dict)
+    return schemas.PurchaseOrder.model_validate(db_po)
 
 @app.put("/api/purchase-orders/{po_id}", response_model=schemas.PurchaseOrder)
 def update_purchase_order(
@@ -1592,24 +1619,7 @@ def update_purchase_order(
     db.commit()
     db.refresh(db_po)
 
-    po_dict = {
-        "id": db_po.id,
-        "po_number": db_po.po_number,
-        "product_id": db_po.product_id,
-        "order_date": db_po.order_date,
-        "expected_date": db_po.expected_date,
-        "quantity": db_po.quantity,
-        "status": db_po.status,
-        "received_date": db_po.received_date,
-        "received_quantity": db_po.received_quantity,
-        "supplier": db_po.supplier,
-        "notes": db_po.notes,
-        "created_at": db_po.created_at,
-        "updated_at": db_po.updated_at,
-        "product_code": db_po.product.code if db_po.product else None,
-        "product_name": db_po.product.name if db_po.product else None
-    }
-    return schemas.PurchaseOrder(**po_dict)
+    return schemas.PurchaseOrder.model_validate(db_po)
 
 @app.post("/api/purchase-orders/{po_id}/receive")
 def receive_purchase_order(
@@ -1632,16 +1642,19 @@ def receive_purchase_order(
     if receive_data.notes:
         db_po.notes = (db_po.notes or "") + f"\nReceived: {receive_data.notes}"
 
-    # Update inventory
-    inventory = db.query(models.Inventory).filter(
-        models.Inventory.product_id == db_po.product_id
-    ).first()
+    received_quantity = float(receive_data.received_quantity)
 
-    previous_on_hand = 0.0
-    if inventory:
-        previous_on_hand = float(inventory.on_hand)
-        inventory.on_hand = float(inventory.on_hand) + float(receive_data.received_quantity)
-    else:
+    # Update inventory - the addition happens in SQL and the new balance comes
+    # back as a plain float, so no Decimal round-trips on the receipt path
+    new_on_hand = db.execute(
+        update(models.Inventory)
+        .where(models.Inventory.product_id == db_po.product_id)
+        .values(on_hand=models.Inventory.on_hand + received_quantity)
+        .returning(type_coerce(models.Inventory.on_hand, Float))
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+    if new_on_hand is None:
         # Create inventory record if it doesn't exist
         inventory = models.Inventory(
             product_id=db_po.product_id,
@@ -1649,8 +1662,12 @@ def receive_purchase_order(
             allocated=0
         )
         db.add(inventory)
+        new_on_hand = received_quantity
 
-    new_on_hand = float(inventory.on_hand)
+    # on_hand is stored with 2 decimal places; round away float noise from the
+    # SQL addition (e.g. 0.1 + 0.2) the same way the Numeric column would
+    new_on_hand = round(new_on_hand, 2)
+    previous_on_hand = round(new_on_hand - received_quantity, 2)
 
     # Create inventory adjustment record with before/after quantities
     enhanced_notes = receive_data.notes or ""
@@ -1673,8 +1690,8 @@ def receive_purchase_order(
     return {
         "message": "Purchase order received successfully",
         "po_id": db_po.id,
-        "received_quantity": float(receive_data.received_quantity),
-        "new_inventory_level": float(inventory.on_hand)
+        "received_quantity": received_quantity,
+        "new_inventory_level": new_on_hand
     }
 
 @app.post("/api/purchase-orders/{po_id}/undo-receipt")
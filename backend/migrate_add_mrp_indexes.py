@@ -0,0 +1,32 @@
+"""
+Migration: Add indexes supporting the MRP hot queries
+Run this script to add indexes that were declared on the models after the
+tables were first created (create_all does not add indexes to existing tables)
+"""
+
+from database import engine
+import models
+
+# Indexes to ensure exist on existing databases
+INDEXES = [
+    index for index in models.MRPResult.__table__.indexes
+    if index.name == 'ix_mrp_result_needs_ordering_date'
+]
+
+def migrate():
+    """Create any missing MRP indexes"""
+
+    print("="*70)
+    print("MIGRATION: Add MRP Indexes")
+    print("="*70)
+
+    for index in INDEXES:
+        print(f"\n✓ Ensuring index '{index.name}' on {index.table.name}...")
+        index.create(bind=engine, checkfirst=True)
+
+    print("\n" + "="*70)
+    print("✓ Migration completed successfully!")
+    print("="*70)
+
+if __name__ == "__main__":
+    migrate()
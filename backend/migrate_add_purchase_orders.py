@@ -7,6 +7,16 @@ This script adds a new table for tracking purchase orders and incoming inventory
 import sqlite3
 from pathlib import Path
 
+def create_pending_index(cursor):
+    """Add the partial index that serves the ?status=pending hot path"""
+    # Only pending POs are indexed, so the index stays small and the
+    # "WHERE status='pending' ORDER BY expected_date" query is a pure range scan
+    print("[INFO] Ensuring pending purchase order index exists...")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_po_pending_expected "
+        "ON purchase_orders(expected_date) WHERE status = 'pending'"
+    )
+
 def migrate_database():
     """Add purchase_orders table to database"""
 
@@ -22,11 +32,19 @@ def migrate_database():
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
+    # Match the pragmas the application applies to its own connections
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+
     try:
         # Check if table already exists
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='purchase_orders'")
         if cursor.fetchone():
-            print("[SUCCESS] purchase_orders table already exists. No migration needed.")
+            print("[SUCCESS] purchase_orders table already exists.")
+            create_pending_index(cursor)
+            conn.commit()
             return True
 
         # Create purchase_orders table
@@ -56,6 +74,7 @@ def migrate_database():
         cursor.execute("CREATE INDEX idx_po_product_id ON purchase_orders(product_id)")
         cursor.execute("CREATE INDEX idx_po_status ON purchase_orders(status)")
         cursor.execute("CREATE INDEX idx_po_expected_date ON purchase_orders(expected_date)")
+        create_pending_index(cursor)
 
         conn.commit()
         print("\n[SUCCESS] Successfully created purchase_orders table")
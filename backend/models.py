@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime, Date, ForeignKey, Text, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Numeric, Boolean, DateTime, Date, ForeignKey, Text, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import func
 from database import Base
 
@@ -64,10 +65,10 @@ class Inventory(Base):
     # Relationships
     product = relationship("Product", back_populates="inventory")
 
-    @property
+    @hybrid_property
     def available(self):
-        """Calculate available quantity"""
-        return float(self.on_hand) - float(self.allocated)
+        """Calculate available quantity (usable in queries as on_hand - allocated)"""
+        return self.on_hand - self.allocated
 
 class DailyDemand(Base):
     """Daily demand forecast for products"""
@@ -110,6 +111,8 @@ class MRPResult(Base):
 
     __table_args__ = (
         UniqueConstraint('product_id', 'result_date', name='uq_product_result_date'),
+        # Supports get_shortages: WHERE needs_ordering = true AND result_date <= cutoff
+        Index('ix_mrp_result_needs_ordering_date', 'needs_ordering', 'result_date'),
     )
 
     # Relationships
@@ -171,5 +174,24 @@ class PurchaseOrder(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Partial index for the pending-PO hot path (status filter + expected_date order)
+        Index(
+            'idx_po_pending_expected', 'expected_date',
+            sqlite_where=text("status = 'pending'"),
+            postgresql_where=text("status = 'pending'")
+        ),
+    )
+
     # Relationships
     product = relationship("Product")
+
+    @property
+    def product_code(self):
+        """Code of the ordered product (for schema serialization)"""
+        return self.product.code if self.product else None
+
+    @property
+    def product_name(self):
+        """Name of the ordered product (for schema serialization)"""
+        return self.product.name if self.product else None
@@ -1,16 +1,71 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, text
+from sqlalchemy.orm import Session, selectinload
 from datetime import date, timedelta
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from decimal import Decimal
+from collections import defaultdict
+from functools import lru_cache
+from itertools import accumulate, islice
 import math
+import operator
 import models
 import schemas
 
+# Rows per INSERT when bulk-loading MRP results
+MRP_RESULT_BATCH_SIZE = 1000
+
+@lru_cache(maxsize=16)
+def horizon_calendar(start_date: date, days: int) -> Tuple[tuple, date, tuple, tuple, tuple]:
+    """
+    Calendar for a planning horizon, built once per (start date, length)
+
+    Args:
+        start_date: First day of the horizon
+        days: Number of days in the horizon
+
+    Returns:
+        Tuple of (dates, Monday of the first week, week index per day,
+        weekday flag per day, Monday of each week in the horizon)
+    """
+    dates = tuple(start_date + timedelta(days=i) for i in range(days))
+    first_week_start = start_date - timedelta(days=start_date.weekday())
+    week_of = tuple((d - first_week_start).days // 7 for d in dates)
+    is_weekday = tuple(d.weekday() < 5 for d in dates)  # Only produce Mon-Fri
+    week_starts = tuple(first_week_start + timedelta(weeks=w) for w in range(week_of[-1] + 1)) if dates else ()
+    return dates, first_week_start, week_of, is_weekday, week_starts
+
+def project_inventory(on_hand: float, reqs: List[float], reorder_point: float,
+                      arrivals: Optional[List[float]] = None) -> Tuple[List[float], List[bool], int]:
+    """
+    Project on-hand inventory across a horizon of daily requirements
+
+    Args:
+        on_hand: Starting on-hand quantity
+        reqs: Requirement for each day of the horizon
+        reorder_point: Level below which the product needs ordering
+        arrivals: Optional quantity received on each day of the horizon
+
+    Returns:
+        Tuple of (projected on-hand per day, needs-ordering flag per day,
+        index of the first day projected below zero or -1 if none)
+    """
+    if arrivals is None:
+        projected = list(accumulate(reqs, operator.sub, initial=on_hand))[1:]
+    else:
+        projected = list(accumulate(
+            zip(reqs, arrivals), lambda qty, day: qty - day[0] + day[1], initial=on_hand
+        ))[1:]
+    needs_ordering = [qty < reorder_point for qty in projected]
+    first_shortage = next((i for i, qty in enumerate(projected) if qty < 0), -1)
+    return projected, needs_ordering, first_shortage
+
 class MRPEngine:
     """Simple MRP calculation engine"""
 
     def __init__(self, db: Session):
         self.db = db
+        # Unit BOM explosions memoized for this engine: {product_id: {component_id: qty}}
+        self.bom_units = {}
 
     def round_up_to_lot_size(self, qty: Decimal, lot_size: Decimal, minimum: Decimal) -> Decimal:
         """
@@ -57,42 +112,76 @@ class MRPEngine:
 
         return reorder_point
 
-    def explode_bom_recursive(self, product_id: int, demand_qty: Decimal, level: int = 0) -> Dict[int, Decimal]:
+    def explode_bom_unit(self, product_id: int,
+                         bom_by_parent: Dict[int, List[models.BOMLine]],
+                         products_by_id: Dict[int, models.Product]) -> Dict[int, float]:
         """
-        Recursively explode BOM for multi-level assemblies
+        Explode BOM for a single unit of a product, memoized per product
+
+        Requirements scale linearly with demand, so callers multiply the unit
+        requirements by the demand quantity instead of re-exploding the tree.
+        Results are memoized for the current MRP run.
+
+        Sub-assemblies are exploded with an iterative depth-first traversal
+        (no recursion depth limit); each one is exploded once and its unit
+        requirements are cached and reused wherever it appears.
 
         Args:
             product_id: Parent product ID
-            demand_qty: Quantity of parent product needed
-            level: Recursion level (to prevent infinite loops)
+            bom_by_parent: Preloaded BOM lines grouped by parent product ID
+            products_by_id: Preloaded products keyed by ID
 
         Returns:
-            Dictionary of {component_id: total_quantity_required}
+            Dictionary of {component_id: quantity_required_per_unit}
+
+        Raises:
+            ValueError: If the BOM contains a circular reference
         """
-        if level > 10:  # Prevent infinite recursion
-            raise ValueError(f"BOM nesting too deep (>10 levels) for product {product_id}")
+        units = self.bom_units
+        if product_id in units:
+            return units[product_id]
+
+        # Post-order traversal: a product is expanded (children pushed) first,
+        # then finished once all of its sub-assemblies have been exploded
+        stack = [(product_id, False)]
+        in_progress = set()  # Products on the current branch (for cycle detection)
+
+        while stack:
+            parent_id, children_done = stack.pop()
+
+            if not children_done:
+                if parent_id in units:
+                    continue
+                in_progress.add(parent_id)
+                stack.append((parent_id, True))
+                for line in bom_by_parent.get(parent_id, []):
+                    component_id = line.component_product_id
+                    if products_by_id[component_id].type != 'sub_assembly':
+                        continue
+                    if component_id in in_progress:
+                        raise ValueError(f"Circular BOM reference: product {component_id} contains itself")
+                    if component_id not in units:
+                        stack.append((component_id, False))
+                continue
 
-        requirements = {}
+            in_progress.discard(parent_id)
+            requirements = {}
 
-        # Get BOM lines for this product
-        bom_lines = self.db.query(models.BOMLine).filter(
-            models.BOMLine.parent_product_id == product_id
-        ).all()
+            for line in bom_by_parent.get(parent_id, []):
+                component_id = line.component_product_id
+                qty_per = float(line.quantity_per)
 
-        for line in bom_lines:
-            component = line.component_product
-            required_qty = demand_qty * line.quantity_per
+                if products_by_id[component_id].type == 'sub_assembly':
+                    # Scale the sub-assembly's (already exploded) unit requirements
+                    for comp_id, unit_qty in units[component_id].items():
+                        requirements[comp_id] = requirements.get(comp_id, 0.0) + unit_qty * qty_per
+                else:
+                    # Leaf component (component or raw_material)
+                    requirements[component_id] = requirements.get(component_id, 0.0) + qty_per
 
-            if component.type == 'sub_assembly':
-                # Recursively explode sub-assembly
-                sub_reqs = self.explode_bom_recursive(component.id, required_qty, level + 1)
-                for comp_id, qty in sub_reqs.items():
-                    requirements[comp_id] = requirements.get(comp_id, Decimal(0)) + qty
-            else:
-                # Leaf component (component or raw_material)
-                requirements[component.id] = requirements.get(component.id, Decimal(0)) + required_qty
+            units[parent_id] = requirements
 
-        return requirements
+        return units[product_id]
 
     def calculate_mrp(self, days: int = 30) -> Dict:
         """
@@ -106,92 +195,113 @@ class MRPEngine:
         """
         print(f"Starting MRP calculation for {days} days...")
 
-        # Clear previous MRP results
-        self.db.query(models.MRPResult).delete()
-        self.db.commit()
+        # Preload products (with inventory) and BOM lines once so the BOM
+        # explosion and per-component loop are lookups instead of queries
+        products_by_id = {
+            p.id: p for p in self.db.query(models.Product).options(
+                selectinload(models.Product.inventory)
+            ).all()
+        }
+        bom_by_parent = defaultdict(list)
+        for line in self.db.query(models.BOMLine).all():
+            bom_by_parent[line.parent_product_id].append(line)
+        # Explosions are only valid for the BOM data loaded by this run
+        self.bom_units = {}
 
         # Get all active finished goods
-        finished_goods = self.db.query(models.Product).filter(
-            models.Product.type == 'finished_good',
-            models.Product.is_active == True
-        ).all()
+        finished_goods = [
+            p for p in products_by_id.values()
+            if p.type == 'finished_good' and p.is_active
+        ]
 
         print(f"Found {len(finished_goods)} finished goods to process")
 
-        # Track all component requirements across all products
-        total_component_requirements = {}
+        # Track all component requirements across all products: one dense row
+        # of daily quantities per component, located through comp_index
+        comp_index = {}
+        total_component_requirements = []
+
+        # Get demand for all finished goods at once
+        demand_by_product = self.get_demand_forecasts([p.id for p in finished_goods], days)
 
         # Process each finished good
         for product in finished_goods:
             print(f"Processing product: {product.code}")
 
             # Get demand for this product
-            demand_data = self.get_demand_forecast(product.id, days)
+            demand_data = demand_by_product.get(product.id, {})
 
             # Explode BOM to get component requirements
-            component_reqs = self.explode_bom(product.id, demand_data)
+            component_reqs = self.explode_bom(product.id, demand_data, bom_by_parent, products_by_id)
 
             # Accumulate component requirements
             for comp_id, daily_reqs in component_reqs.items():
-                if comp_id not in total_component_requirements:
-                    total_component_requirements[comp_id] = {}
+                row = comp_index.get(comp_id)
+                if row is None:
+                    row = comp_index[comp_id] = len(total_component_requirements)
+                    total_component_requirements.append([0.0] * days)
 
+                comp_reqs = total_component_requirements[row]
                 for day, qty in daily_reqs.items():
-                    total_component_requirements[comp_id][day] = \
-                        total_component_requirements[comp_id].get(day, Decimal(0)) + qty
+                    comp_reqs[day] += qty
 
         print(f"Component requirements calculated for {len(total_component_requirements)} components")
 
         # Now calculate projected inventory for each component
+        start_date = date.today()
+        dates = horizon_calendar(start_date, days)[0]
+
         shortages = []
-        for component_id, daily_reqs in total_component_requirements.items():
-            component = self.db.query(models.Product).filter(models.Product.id == component_id).first()
+        mrp_rows = []
+        for component_id, row in comp_index.items():
+            component = products_by_id.get(component_id)
             if not component:
                 continue
 
             # Get current inventory
-            inventory = self.db.query(models.Inventory).filter(
-                models.Inventory.product_id == component_id
-            ).first()
+            inventory = component.inventory
 
             on_hand = float(inventory.on_hand) if inventory else 0.0
-            projected = on_hand
-
-            # Calculate day by day
-            start_date = date.today()
-            shortage_detected = False
-            shortage_date = None
-
-            for day_offset in range(days):
-                current_date = start_date + timedelta(days=day_offset)
-                day_requirement = float(daily_reqs.get(day_offset, Decimal(0)))
-
-                # Subtract daily requirement
-                projected -= day_requirement
-
-                # Save MRP result for this day
-                mrp_result = models.MRPResult(
-                    product_id=component_id,
-                    result_date=current_date,
-                    projected_onhand=Decimal(str(projected)),
-                    needs_ordering=(projected < float(component.reorder_point)),
-                    shortage_date=current_date if projected < 0 else None
-                )
-                self.db.add(mrp_result)
-
-                # Check for shortage
-                if projected < 0 and not shortage_detected:
-                    shortage_detected = True
-                    shortage_date = current_date
-                    shortages.append({
-                        'product_id': component_id,
-                        'product_code': component.code,
-                        'product_name': component.name,
-                        'shortage_date': shortage_date,
-                        'projected_inventory': projected,
-                        'reorder_point': float(component.reorder_point),
-                        'reorder_qty': float(component.reorder_qty)
-                    })
+            reorder_point = float(component.reorder_point)
+
+            # Projected on-hand for every day: on_hand minus the running total
+            # of daily requirements
+            reqs = total_component_requirements[row]
+            projected, needs_ordering, shortage_idx = project_inventory(on_hand, reqs, reorder_point)
+
+            # Collect MRP results for every day (inserted in bulk below)
+            mrp_rows.extend(
+                {
+                    'product_id': component_id,
+                    'result_date': current_date,
+                    'projected_onhand': Decimal(f'{projected_qty:.2f}'),
+                    'needs_ordering': needs,
+                    'shortage_date': current_date if projected_qty < 0 else None
+                }
+                for current_date, projected_qty, needs in zip(dates, projected, needs_ordering)
+            )
+
+            # Check for shortage (first day projected inventory goes negative)
+            if shortage_idx >= 0:
+                shortages.append({
+                    'product_id': component_id,
+                    'product_code': component.code,
+                    'product_name': component.name,
+                    'shortage_date': dates[shortage_idx],
+                    'projected_inventory': projected[shortage_idx],
+                    'reorder_point': reorder_point,
+                    'reorder_qty': float(component.reorder_qty)
+                })
+
+        # Clear previous MRP results. The table is rebuilt from scratch, and an
+        # unqualified DELETE takes SQLite's truncate fast path. The reload
+        # commits in the same transaction.
+        self.db.execute(text("DELETE FROM mrp_results"))
+
+        # Save MRP results with multi-row INSERTs instead of one ORM object per row
+        rows = iter(mrp_rows)
+        while batch := list(islice(rows, MRP_RESULT_BATCH_SIZE)):
+            self.db.execute(insert(models.MRPResult), batch)
 
         self.db.commit()
         print(f"MRP calculation complete. Found {len(shortages)} shortages")
@@ -202,30 +312,35 @@ class MRPEngine:
             'components_analyzed': len(total_component_requirements)
         }
 
-    def explode_bom(self, product_id: int, demand_data: Dict[int, Decimal]) -> Dict[int, Dict[int, Decimal]]:
+    def explode_bom(self, product_id: int, demand_data: Dict[int, Decimal],
+                    bom_by_parent: Dict[int, List[models.BOMLine]],
+                    products_by_id: Dict[int, models.Product]) -> Dict[int, Dict[int, float]]:
         """
         Explode BOM for a product given its demand forecast (with multi-level support)
 
         Args:
             product_id: Product to explode
             demand_data: Dictionary of {day_offset: quantity}
+            bom_by_parent: Preloaded BOM lines grouped by parent product ID
+            products_by_id: Preloaded products keyed by ID
 
         Returns:
             Dictionary of {component_id: {day_offset: quantity_required}}
         """
         component_requirements = {}
 
-        # For each day's demand, explode BOM recursively
+        # Explode the BOM once for a single unit (handles sub-assemblies)
+        unit_reqs = self.explode_bom_unit(product_id, bom_by_parent, products_by_id)
+
+        # Scale the unit requirements by each day's demand (float math; Decimal
+        # is only used again when results are persisted)
         for day_offset, demand_qty in demand_data.items():
             if demand_qty > 0:
-                # Use recursive BOM explosion to handle sub-assemblies
-                daily_reqs = self.explode_bom_recursive(product_id, demand_qty)
-
-                # Accumulate requirements by day
-                for component_id, qty in daily_reqs.items():
+                demand_qty = float(demand_qty)
+                for component_id, unit_qty in unit_reqs.items():
                     if component_id not in component_requirements:
                         component_requirements[component_id] = {}
-                    component_requirements[component_id][day_offset] = qty
+                    component_requirements[component_id][day_offset] = unit_qty * demand_qty
 
         return component_requirements
 
@@ -238,23 +353,39 @@ class MRPEngine:
             days: Number of days to forecast
 
         Returns:
-            Dictionary of {day_offset: quantity}
+            Dictionary of {day_offset: quantity} (days without demand are omitted)
         """
-        demand_data = {}
-        start_date = date.today()
+        return self.get_demand_forecasts([product_id], days).get(product_id, {})
 
-        for day_offset in range(days):
-            current_date = start_date + timedelta(days=day_offset)
+    def get_demand_forecasts(self, product_ids: List[int], days: int) -> Dict[int, Dict[int, Decimal]]:
+        """
+        Get demand forecasts for several products with a single query
 
-            # Look up demand in database
-            demand = self.db.query(models.DailyDemand).filter(
-                models.DailyDemand.product_id == product_id,
-                models.DailyDemand.demand_date == current_date
-            ).first()
+        Args:
+            product_ids: Product IDs
+            days: Number of days to forecast
 
-            demand_data[day_offset] = demand.quantity if demand else Decimal(0)
+        Returns:
+            Dictionary of {product_id: {day_offset: quantity}} (days without demand are omitted)
+        """
+        start_date = date.today()
 
-        return demand_data
+        # One range query covering every product and the whole horizon
+        rows = self.db.query(
+            models.DailyDemand.product_id,
+            models.DailyDemand.demand_date,
+            models.DailyDemand.quantity
+        ).filter(
+            models.DailyDemand.product_id.in_(product_ids),
+            models.DailyDemand.demand_date >= start_date,
+            models.DailyDemand.demand_date < start_date + timedelta(days=days)
+        ).all()
+
+        demand_by_product = defaultdict(dict)
+        for product_id, demand_date, quantity in rows:
+            demand_by_product[product_id][(demand_date - start_date).days] = quantity
+
+        return demand_by_product
 
     def get_shortages(self, days: int = 14) -> List[schemas.ShortageAlert]:
         """
@@ -272,22 +403,29 @@ class MRPEngine:
         shortage_results = self.db.query(models.MRPResult).filter(
             models.MRPResult.needs_ordering == True,
             models.MRPResult.result_date <= cutoff_date
-        ).all()
+        ).order_by(
+            models.MRPResult.product_id,
+            models.MRPResult.result_date
+        ).options(selectinload(models.MRPResult.product)).yield_per(1000)
 
-        # Group by product (only show earliest shortage)
+        # Group by product (only show earliest shortage); rows arrive
+        # ordered by date within each product, so the first one wins
         product_shortages = {}
         for result in shortage_results:
             if result.product_id not in product_shortages:
                 product_shortages[result.product_id] = result
-            elif result.result_date < product_shortages[result.product_id].result_date:
-                product_shortages[result.product_id] = result
+
+        # Get inventory for all shortage products in one query
+        inv_by_pid = {
+            inv.product_id: inv for inv in self.db.query(models.Inventory).filter(
+                models.Inventory.product_id.in_(list(product_shortages))
+            ).all()
+        }
 
         # Build shortage alerts
         for product_id, result in product_shortages.items():
             product = result.product
-            inventory = self.db.query(models.Inventory).filter(
-                models.Inventory.product_id == product_id
-            ).first()
+            inventory = inv_by_pid.get(product_id)
 
             lead_time = product.lead_time_days or 0
             shortage_date = result.shortage_date or result.result_date
@@ -329,127 +467,105 @@ class MRPEngine:
 
     def get_dashboard_data(self) -> schemas.DashboardData:
         """Get summary data for dashboard based on weekly shipment goals"""
-        from collections import defaultdict
-
-        # Get all active products
-        all_products = self.db.query(models.Product).filter(
-            models.Product.is_active == True
-        ).all()
-
-        # Count products and components
-        total_products = sum(1 for p in all_products if p.type == 'finished_good')
-        total_components = sum(1 for p in all_products if p.type == 'component')
-
-        # Count inventory items (only for active products)
-        # Use a join to ensure we only count inventory for products that are currently active
-        total_inventory_value = self.db.query(models.Inventory).join(
-            models.Product,
+        # All dashboard counts in one aggregate over active products (with
+        # their inventory row, if any). Inventory is one-to-one with products,
+        # so the outer join never duplicates a product.
+        (
+            total_products,
+            total_components,
+            total_inventory_value,
+            low_stock_count
+        ) = self.db.query(
+            func.count(models.Product.id).filter(models.Product.type == 'finished_good'),
+            func.count(models.Product.id).filter(models.Product.type == 'component'),
+            # Count inventory items (only for active products)
+            func.count(models.Inventory.id),
+            # Count active products stocked below their reorder point
+            func.count(models.Inventory.id).filter(
+                models.Product.reorder_point > 0,
+                models.Inventory.on_hand < models.Product.reorder_point
+            )
+        ).select_from(models.Product).outerjoin(
+            models.Inventory,
             models.Inventory.product_id == models.Product.id
         ).filter(
             models.Product.is_active == True
-        ).count()
-
-        # Count products by status
-        low_stock_count = 0
-
-        for product in all_products:
-            inventory = self.db.query(models.Inventory).filter(
-                models.Inventory.product_id == product.id
-            ).first()
-
-            if not inventory:
-                continue
-
-            on_hand = float(inventory.on_hand)
-            reorder_point = float(product.reorder_point) if product.reorder_point else 0
-
-            if reorder_point > 0 and on_hand < reorder_point:
-                low_stock_count += 1
+        ).one()
 
         # Calculate projected shortages based on weekly shipment goals (next 90 days)
         days = 90
         start_date = date.today()
-        dates = [start_date + timedelta(days=i) for i in range(days)]
 
-        # Get weekly shipment goals
-        week_starts = set()
-        for d in dates:
-            week_start = d - timedelta(days=d.weekday())
-            week_starts.add(week_start)
+        # Dates, week index and weekday flag for each day (cached per horizon)
+        dates, first_week_start, week_of, is_weekday, week_starts = horizon_calendar(start_date, days)
 
+        # Get weekly shipment goals
         all_shipments = self.db.query(models.WeeklyShipment).filter(
-            models.WeeklyShipment.week_start_date.in_(list(week_starts))
+            models.WeeklyShipment.week_start_date.in_(week_starts)
         ).all()
 
-        # Group shipments by product_id and week
-        shipments_by_product = defaultdict(dict)
+        # Group shipment goals by product_id into a list indexed by week number
+        num_weeks = len(week_starts)
+        shipments_by_product = defaultdict(lambda: [0.0] * num_weeks)
         for s in all_shipments:
-            shipments_by_product[s.product_id][s.week_start_date] = float(s.goal)
+            shipments_by_product[s.product_id][(s.week_start_date - first_week_start).days // 7] = float(s.goal)
 
-        # Calculate daily production targets for EACH product
-        daily_production_by_product = defaultdict(dict)
+        # Daily production targets for EACH product, ordered like `dates`:
+        # a fifth of the week's goal on weekdays, nothing on weekends
+        production_by_parent = {}
         for product_id, weekly_goals in shipments_by_product.items():
-            for d in dates:
-                week_start = d - timedelta(days=d.weekday())
-                weekly_goal = weekly_goals.get(week_start, 0)
-                # Only produce on weekdays (Mon-Fri)
-                if d.weekday() < 5:  # 0-4 are Mon-Fri
-                    daily_production_by_product[product_id][d] = weekly_goal / 5
-                else:
-                    daily_production_by_product[product_id][d] = 0
-
-        # Get ALL BOM lines
-        all_bom_lines = self.db.query(models.BOMLine).all()
-
-        # Group BOM lines by component
-        component_usage = defaultdict(list)
-        for bom_line in all_bom_lines:
-            component_usage[bom_line.component_product_id].append({
-                'parent_product_id': bom_line.parent_product_id,
-                'quantity_per': float(bom_line.quantity_per)
-            })
+            daily_rate_by_week = [goal / 5 for goal in weekly_goals]
+            production_by_parent[product_id] = [
+                daily_rate_by_week[week] if weekday else 0.0
+                for week, weekday in zip(week_of, is_weekday)
+            ]
+
+        # Daily consumption for every component used in a BOM, built in one
+        # pass over ALL BOM lines: one dense row per component, ordered like `dates`
+        consumption_by_component = {}
+        for component_id, parent_id, quantity_per in self.db.query(
+            models.BOMLine.component_product_id,
+            models.BOMLine.parent_product_id,
+            models.BOMLine.quantity_per
+        ):
+            consumption = consumption_by_component.setdefault(component_id, [0.0] * days)
+            production = production_by_parent.get(parent_id)
+            if production is None:
+                continue
+            quantity_per = float(quantity_per)
+            for i, qty in enumerate(production):
+                consumption[i] += qty * quantity_per
 
-        # Get all components
+        # Get all active components and their on-hand stock
         all_components = self.db.query(models.Product).filter(
-            models.Product.type == 'component',
-            models.Product.is_active == True
+            models.Product.is_active == True,
+            models.Product.type == 'component'
         ).all()
+        on_hand_by_pid = dict(
+            self.db.query(models.Inventory.product_id, models.Inventory.on_hand).join(
+                models.Product,
+                models.Inventory.product_id == models.Product.id
+            ).filter(
+                models.Product.is_active == True,
+                models.Product.type == 'component'
+            ).all()
+        )
 
         # Find components with shortages
         formatted_shortages = []
         for component in all_components:
-            if component.id not in component_usage:
+            consumption = consumption_by_component.get(component.id)
+            if consumption is None:
                 continue
 
             # Get current inventory
-            inventory = self.db.query(models.Inventory).filter(
-                models.Inventory.product_id == component.id
-            ).first()
-            current_stock = float(inventory.on_hand) if inventory else 0
-
-            # Calculate daily consumption and projected inventory
-            running_inventory = current_stock
-            run_out_date = None
-
-            for d in dates:
-                total_consumption = 0
-
-                # Sum consumption from ALL products that use this component
-                for usage in component_usage[component.id]:
-                    parent_product_id = usage['parent_product_id']
-                    quantity_per = usage['quantity_per']
-
-                    if parent_product_id in daily_production_by_product:
-                        production = daily_production_by_product[parent_product_id].get(d, 0)
-                        consumption = production * quantity_per
-                        total_consumption += consumption
-
-                running_inventory -= total_consumption
-
-                # Record when we first go negative
-                if run_out_date is None and running_inventory < 0:
-                    run_out_date = d
-                    break
+            on_hand = on_hand_by_pid.get(component.id)
+            current_stock = float(on_hand) if on_hand is not None else 0
+
+            # Projected inventory at the end of each day; record when we first go negative
+            reorder_point = float(component.reorder_point) if component.reorder_point else 0.0
+            _, _, run_out_idx = project_inventory(current_stock, consumption, reorder_point)
+            run_out_date = dates[run_out_idx] if run_out_idx >= 0 else None
 
             # If component will run out in the next 90 days, add to shortages
             if run_out_date:
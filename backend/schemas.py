@@ -3,6 +3,11 @@ from typing import Optional, List
 from datetime import datetime, date
 from decimal import Decimal
 
+# Shared (immutable) Decimal defaults so missing fields default to a Decimal
+# rather than a bare int
+_DEC_ZERO = Decimal("0")
+_DEC_ONE = Decimal("1")
+
 # ============================================================================
 # PRODUCT SCHEMAS
 # ============================================================================
@@ -12,12 +17,12 @@ class ProductBase(BaseModel):
     name: str = Field(..., max_length=200)
     type: str = Field(..., pattern="^(finished_good|sub_assembly|component|raw_material)$")
     uom: str = Field(..., max_length=10)
-    reorder_point: Optional[Decimal] = 0
-    reorder_qty: Optional[Decimal] = 0
+    reorder_point: Optional[Decimal] = _DEC_ZERO
+    reorder_qty: Optional[Decimal] = _DEC_ZERO
     lead_time_days: Optional[int] = 0
-    safety_stock: Optional[Decimal] = 0
-    order_multiple: Optional[Decimal] = 1
-    minimum_order_qty: Optional[Decimal] = 0
+    safety_stock: Optional[Decimal] = _DEC_ZERO
+    order_multiple: Optional[Decimal] = _DEC_ONE
+    minimum_order_qty: Optional[Decimal] = _DEC_ZERO
     critical_days: Optional[int] = 7
     warning_days: Optional[int] = 14
     caution_days: Optional[int] = 30
@@ -89,8 +94,8 @@ class BOMUpdate(BaseModel):
 # ============================================================================
 
 class InventoryBase(BaseModel):
-    on_hand: Decimal = 0
-    allocated: Decimal = 0
+    on_hand: Decimal = _DEC_ZERO
+    allocated: Decimal = _DEC_ZERO
 
 class InventoryUpdate(BaseModel):
     on_hand: Optional[Decimal] = None
@@ -231,8 +236,8 @@ class MultiProductSalesUpdate(BaseModel):
 class WeeklyShipmentBase(BaseModel):
     product_id: int
     week_start_date: date
-    goal: Decimal = 0
-    shipped: Decimal = 0
+    goal: Decimal = _DEC_ZERO
+    shipped: Decimal = _DEC_ZERO
     notes: Optional[str] = None
 
 class WeeklyShipmentCreate(WeeklyShipmentBase):
@@ -1,26 +1,26 @@
+from sqlalchemy import func
+
 from database import SessionLocal
 import models
 
 db = SessionLocal()
 
 try:
-    products = db.query(models.Product).all()
-    print(f'Total products: {len(products)}')
+    print(f'Total products: {db.query(func.count(models.Product.id)).scalar()}')
     print('\nProducts:')
-    for p in products:
-        print(f'  {p.code} - {p.name} ({p.type})')
+    for code, name, product_type in db.query(
+        models.Product.code, models.Product.name, models.Product.type
+    ).yield_per(500):
+        print(f'  {code} - {name} ({product_type})')
 
     print('\n\nInventory counts:')
-    inventory = db.query(models.Inventory).all()
-    print(f'Total inventory records: {len(inventory)}')
+    print(f'Total inventory records: {db.query(func.count(models.Inventory.id)).scalar()}')
 
     print('\n\nBOM lines:')
-    bom = db.query(models.BOMLine).all()
-    print(f'Total BOM lines: {len(bom)}')
+    print(f'Total BOM lines: {db.query(func.count(models.BOMLine.id)).scalar()}')
 
     print('\n\nDemand records:')
-    demand = db.query(models.DailyDemand).all()
-    print(f'Total demand records: {len(demand)}')
+    print(f'Total demand records: {db.query(func.count(models.DailyDemand.id)).scalar()}')
 
 finally:
     db.close()
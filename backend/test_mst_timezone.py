@@ -5,9 +5,14 @@ Test script to verify MST timezone and MRP API integration
 
 import requests
 import json
+import os
+import sys
 from datetime import datetime
 import pytz
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from database import get_mst_now, MST_TIMEZONE
+
 # Configuration
 MRP_API_URL = "http://192.168.1.18:8000/api/sales/bulk-import"
 
@@ -15,13 +20,7 @@ def test_mst_timezone():
     """Test MST timezone setup"""
     print("=== Testing MST Timezone Setup ===")
 
-    # Import and test the MST function
-    import sys
-    import os
-    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-    from database import get_mst_now, MST_TIMEZONE
-
+    # Test the MST function
     mst_time = get_mst_now()
     utc_time = datetime.now(pytz.UTC)
 
@@ -36,11 +35,6 @@ def test_mrp_api():
     print("=== Testing MRP API Integration ===")
 
     # Get current date in MST
-    import sys
-    import os
-    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    from database import get_mst_now
-
     today_mst = get_mst_now().strftime('%Y-%m-%d')
 
     # Test payload - sample trigger sales for today
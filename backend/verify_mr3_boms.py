@@ -2,34 +2,46 @@ import sys
 import io
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
+from collections import defaultdict
+
 from database import SessionLocal
 import models
 
 db = SessionLocal()
 
 try:
+    # Load product id -> (code, name) once; every lookup below is a dict hit
+    PROD_BY_ID = {
+        pid: (code, name)
+        for pid, code, name in db.query(models.Product.id, models.Product.code, models.Product.name)
+    }
+    PROD_ID_BY_CODE = {code: pid for pid, (code, _) in PROD_BY_ID.items()}
+
     # Check MR3 products
-    mr3_str = db.query(models.Product).filter(models.Product.code == "MR3-TRIG-STR").first()
-    mr3_curv = db.query(models.Product).filter(models.Product.code == "MR3-TRIG-CURV").first()
+    mr3_str_id = PROD_ID_BY_CODE["MR3-TRIG-STR"]
+    mr3_curv_id = PROD_ID_BY_CODE["MR3-TRIG-CURV"]
 
     print("=== MR3 PRODUCTS ===")
-    print(f"MR3-TRIG-STR: {mr3_str.name} (ID: {mr3_str.id})")
-    print(f"MR3-TRIG-CURV: {mr3_curv.name} (ID: {mr3_curv.id})")
+    print(f"MR3-TRIG-STR: {PROD_BY_ID[mr3_str_id][1]} (ID: {mr3_str_id})")
+    print(f"MR3-TRIG-CURV: {PROD_BY_ID[mr3_curv_id][1]} (ID: {mr3_curv_id})")
+
+    # Fetch both BOMs in a single query
+    bom_by_parent = defaultdict(list)
+    for parent_id, component_id, quantity_per in db.query(
+        models.BOMLine.parent_product_id,
+        models.BOMLine.component_product_id,
+        models.BOMLine.quantity_per
+    ).filter(models.BOMLine.parent_product_id.in_([mr3_str_id, mr3_curv_id])):
+        bom_by_parent[parent_id].append((component_id, quantity_per))
 
     # Check BOMs
-    print("\n=== MR3-TRIG-STR BOM ===")
-    str_bom = db.query(models.BOMLine).filter(models.BOMLine.parent_product_id == mr3_str.id).all()
-    for bom in str_bom:
-        component = db.query(models.Product).filter(models.Product.id == bom.component_product_id).first()
-        print(f"  {component.code:20s} x {bom.quantity_per}")
-    print(f"Total: {len(str_bom)} components")
-
-    print("\n=== MR3-TRIG-CURV BOM ===")
-    curv_bom = db.query(models.BOMLine).filter(models.BOMLine.parent_product_id == mr3_curv.id).all()
-    for bom in curv_bom:
-        component = db.query(models.Product).filter(models.Product.id == bom.component_product_id).first()
-        print(f"  {component.code:20s} x {bom.quantity_per}")
-    print(f"Total: {len(curv_bom)} components")
+    for code, parent_id in (("MR3-TRIG-STR", mr3_str_id), ("MR3-TRIG-CURV", mr3_curv_id)):
+        print(f"\n=== {code} BOM ===")
+        bom = bom_by_parent[parent_id]
+        for component_id, quantity_per in bom:
+            component_code, _ = PROD_BY_ID[component_id]
+            print(f"  {component_code:20s} x {quantity_per}")
+        print(f"Total: {len(bom)} components")
 
 finally:
     db.close()
@@ -14,10 +14,32 @@ Date: 2024-11-12
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import gzip
 import json
 from datetime import datetime, timedelta
+from itertools import islice
+import logging
 import sys
 
+# orjson is a faster drop-in for (de)serializing large payloads; fall back to
+# the standard library when it is not installed
+try:
+    import orjson
+
+    def json_dumps(obj):
+        return orjson.dumps(obj)
+
+    def json_loads(data):
+        return orjson.loads(data)
+except ImportError:
+    def json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+
+    def json_loads(data):
+        return json.loads(data)
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
@@ -32,6 +54,27 @@ MRP_API_URL = "http://localhost:8000/api/sales/bulk-import"
 # Log file (optional)
 LOG_FILE = "sales_import.log"
 
+# Sales date being imported (yesterday), computed once per run
+YESTERDAY = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+
+# Maximum number of products sent in a single import request
+IMPORT_CHUNK_SIZE = 500
+
+# One pooled HTTP session reused for every request (keep-alive). Imports are
+# upserts by product and date, so retrying a failed POST is safe.
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=4,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"POST"})
+    )
+))
+SESSION.mount("https://", SESSION.get_adapter("http://"))
+
 # ============================================================================
 # DATA SOURCE FUNCTION - CUSTOMIZE THIS!
 # ============================================================================
@@ -58,33 +101,30 @@ def get_sales_data():
         }
     """
 
-    # Example: Get yesterday's date
-    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-
     # TODO: Replace this example data with your actual data source
     # Example options:
 
     # Option 1: Read from CSV file
-    # return read_sales_from_csv(f"sales_{yesterday}.csv")
+    # return read_sales_from_csv(f"sales_{YESTERDAY}.csv")
 
     # Option 2: Query your database
-    # return query_sales_database(yesterday)
+    # return query_sales_database(YESTERDAY)
 
     # Option 3: Call your external API
-    # return fetch_from_external_api(yesterday)
+    # return fetch_from_external_api(YESTERDAY)
 
     # Example data (REPLACE THIS):
     sales_data = {
         "TRIG-001": [
             {
-                "sale_date": yesterday,
+                "sale_date": YESTERDAY,
                 "quantity_sold": 15,
                 "notes": "Auto-imported from external system"
             }
         ],
         "TRIG-002": [
             {
-                "sale_date": yesterday,
+                "sale_date": YESTERDAY,
                 "quantity_sold": 22,
                 "notes": ""
             }
@@ -100,24 +140,33 @@ def get_sales_data():
 
 def read_sales_from_csv(csv_file):
     """
-    Example: Read sales from CSV file
+    Example: Read sales from CSV file (requires pandas)
     CSV format: product_code,sale_date,quantity_sold,notes
     """
-    import csv
-    from collections import defaultdict
-
-    sales_by_product = defaultdict(list)
+    import pandas as pd
 
     try:
-        with open(csv_file, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                sales_by_product[row['product_code']].append({
-                    'sale_date': row['sale_date'],
-                    'quantity_sold': int(row['quantity_sold']),
-                    'notes': row.get('notes', '')
-                })
-        return dict(sales_by_product)
+        # Parse with pandas' C reader; keep dates as the strings the API expects
+        df = pd.read_csv(
+            csv_file,
+            dtype={'product_code': str, 'sale_date': str, 'notes': str},
+            keep_default_na=False
+        )
+        df['quantity_sold'] = df['quantity_sold'].astype('int32')
+        if 'notes' not in df:
+            df['notes'] = ''
+
+        # Collapse multiple rows for the same product and day into one record;
+        # sales history is unique per (product, date), so duplicate rows would
+        # otherwise make the import fail
+        df = df.groupby(['product_code', 'sale_date'], as_index=False, sort=False).agg(
+            {'quantity_sold': 'sum', 'notes': 'first'}
+        )
+
+        return {
+            product_code: group[['sale_date', 'quantity_sold', 'notes']].to_dict('records')
+            for product_code, group in df.groupby('product_code', sort=False)
+        }
     except FileNotFoundError:
         print(f"CSV file not found: {csv_file}")
         return {}
@@ -208,22 +257,30 @@ def import_sales_to_mrp(sales_data):
         log_message("No sales data to import")
         return False
 
-    payload = {
-        "sales_by_product_code": sales_data
-    }
-
     log_message(f"Importing sales for {len(sales_data)} products...")
 
     try:
-        response = requests.post(
-            MRP_API_URL,
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=30
-        )
+        # Send the products in chunks over the pooled connection
+        product_codes = iter(sales_data)
+        while chunk := list(islice(product_codes, IMPORT_CHUNK_SIZE)):
+            payload = {
+                "sales_by_product_code": {code: sales_data[code] for code in chunk}
+            }
+
+            # Repeated sale records compress well; the server inflates the body
+            response = SESSION.post(
+                MRP_API_URL,
+                data=gzip.compress(json_dumps(payload)),
+                headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+                timeout=30
+            )
 
-        if response.status_code == 200:
-            result = response.json()
+            if response.status_code != 200:
+                log_message(f"✗ HTTP Error {response.status_code}")
+                log_message(f"  Response: {response.text}")
+                return False
+
+            result = json_loads(response.content)
             log_message(f"✓ Success: {result['message']}")
             log_message(f"  Total records: {result['results']['total_records']}")
 
@@ -237,12 +294,7 @@ def import_sales_to_mrp(sales_data):
                 for error in result['results']['errors']:
                     log_message(f"  ✗ {error['product_code']}: {error['error']}")
 
-            return True
-
-        else:
-            log_message(f"✗ HTTP Error {response.status_code}")
-            log_message(f"  Response: {response.text}")
-            return False
+        return True
 
     except requests.exceptions.ConnectionError:
         log_message("✗ Connection Error: Unable to reach MRP server")
@@ -265,21 +317,36 @@ def import_sales_to_mrp(sales_data):
 # LOGGING
 # ============================================================================
 
-def log_message(message):
-    """Write message to console and log file"""
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    log_line = f"[{timestamp}] {message}"
+def setup_logger():
+    """Create the import logger, writing to the console and (optionally) the log file"""
+    logger = logging.getLogger("sales_import")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    formatter = logging.Formatter('[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
 
     # Print to console
-    print(log_line)
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(formatter)
+    logger.addHandler(console_handler)
 
-    # Write to log file (optional)
+    # Write to log file (optional); the file is opened once for the whole run
+    # and each line is flushed as it is logged, so a killed run loses nothing
     try:
-        with open(LOG_FILE, 'a') as f:
-            f.write(log_line + '\n')
+        file_handler = logging.FileHandler(LOG_FILE, mode='a', encoding='utf-8')
+        file_handler.setFormatter(formatter)
+        logger.addHandler(file_handler)
     except Exception as e:
         print(f"Warning: Could not write to log file: {e}")
 
+    return logger
+
+LOGGER = setup_logger()
+
+def log_message(message):
+    """Write message to console and log file"""
+    LOGGER.info(message)
+
 # ============================================================================
 # MAIN FUNCTION
 # ============================================================================
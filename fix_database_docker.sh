@@ -72,7 +72,11 @@ sleep 3
 # Check if database file exists
 if [ -f ~/mrp-mvp/data/mrp.db ]; then
     echo "6. Copying database file into container..."
-    docker cp ~/mrp-mvp/data/mrp.db mrp-backend:/app/data/mrp.db
+    # The live database runs in WAL mode, so never overwrite mrp.db while the
+    # backend is running; copy it alongside and restore through SQLite instead
+    docker cp ~/mrp-mvp/data/mrp.db mrp-backend:/app/data/mrp_import.db
+    docker exec mrp-backend sqlite3 /app/data/mrp.db ".restore '/app/data/mrp_import.db'"
+    docker exec mrp-backend rm -f /app/data/mrp_import.db
 
     # Fix permissions inside container
     echo "7. Setting permissions inside container..."
@@ -43,7 +43,11 @@ sleep 5
 if [ -f ~/mrp-mvp/data/mrp.db ]; then
     echo ""
     echo "Step 6: Copying database into container..."
-    docker cp ~/mrp-mvp/data/mrp.db mrp-backend:/app/data/mrp.db
+    # The live database runs in WAL mode, so never overwrite mrp.db while the
+    # backend is running; copy it alongside and restore through SQLite instead
+    docker cp ~/mrp-mvp/data/mrp.db mrp-backend:/app/data/mrp_import.db
+    docker exec mrp-backend sqlite3 /app/data/mrp.db ".restore '/app/data/mrp_import.db'"
+    docker exec mrp-backend rm -f /app/data/mrp_import.db
 
     # Set permissions
     echo "Step 7: Setting database permissions..."